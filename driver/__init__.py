@@ -1 +1,9 @@
-from .driver import Driver
\ No newline at end of file
+from .headless_driver import HeadlessDriver
+
+
+def __getattr__(name):
+    # Driver с REST API импортирует aiohttp, поэтому загружается только при обращении
+    if name == 'Driver':
+        from .driver import Driver
+        return Driver
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,18 +1,25 @@
 import asyncio
 import json
 import uuid
-from datetime import datetime
 
 from aiohttp import web
 from aiohttp.web import middleware
 
 from high_level_interface import IHighInterface
-from settings import DRIVER_TELEMETRY_DELAY, DRIVER_SHOW_TELEMETRY, REST_API_PORT, DRIVER_TELEMETRY_LOG_FILENAME
+from high_level_interface.exceptions import ChannelLockedException
+from settings import REST_API_PORT, SEQUENCE_DISCONNECT_CHECK_INTERVAL, POWER_SUPPLY_CHANNEL_LIMITATIONS
+from .exceptions import SequenceValidationException
+from .headless_driver import HeadlessDriver
+from .sequence import Sequence, SequenceRunner
 
 
-class Driver:
-    def __init__(self, interface: IHighInterface):
-        self.interface = interface
+class Driver(HeadlessDriver):
+    """
+    Драйвер со сбором телеметрии и REST API
+    """
+    def __init__(self, interface: IHighInterface, protection_rules: dict = None):
+        super().__init__(interface, protection_rules=protection_rules)
+        self.sequence_task = None  # Выполняющаяся последовательность, одновременно допускается только одна
 
     @middleware
     async def add_method_trace(self, request, handler):
@@ -33,27 +40,6 @@ class Driver:
         resp.headers['Uuid'] = uid
         return resp
 
-    async def gather_telemetry(self):
-        """
-        Метод сбора и сохранения телеметрии с состоянием каналов блока питания в файл
-        """
-        while True:
-            tele_task = asyncio.create_task(self.interface.get_telemetry())
-            await tele_task
-            if DRIVER_SHOW_TELEMETRY:
-                print(tele_task.result())
-            with open(DRIVER_TELEMETRY_LOG_FILENAME, 'a') as file:
-                file.write(f'{datetime.strftime(datetime.now(), "%Y.%m.%d %H-%M-%S-%f")} Telemetry:\n')
-                for key, data in tele_task.result().items():
-                    file.write(f'    Channel {key}:\n')
-                    file.write(f'        State: {data["state"]}\n')
-                    file.write(f'        Current: {data["current"]}A\n')
-                    file.write(f'        Voltage: {data["voltage"]}V\n')
-                    file.write(f'        Power: {data["power"]}W\n')
-                    file.write(f'        Timestamp: {data["timestamp"]}\n')
-                file.write('\n\n')
-            await asyncio.sleep(DRIVER_TELEMETRY_DELAY)
-
     async def telemetry(self, _, uid: str = None):
         """
         REST метод получения телеметрии
@@ -69,12 +55,15 @@ class Driver:
             return web.Response(text=json.dumps({'error': 'You need to pass channel, current and voltage as body!'}),
                                 status=400)
 
-        await self.interface.turn_on_channel(
-            channel_number=data['channel'],
-            voltage=data['voltage'],
-            current=data['current'],
-            uuid=uid
-        )
+        try:
+            await self.interface.turn_on_channel(
+                channel_number=data['channel'],
+                voltage=data['voltage'],
+                current=data['current'],
+                uuid=uid
+            )
+        except ChannelLockedException as e:
+            return web.Response(text=json.dumps({'error': str(e)}), status=409)
 
         return web.Response(status=200)
 
@@ -93,9 +82,86 @@ class Driver:
 
         return web.Response(status=200)
 
-    async def start_rest_api(self):
+    async def reset_protection(self, request, uid: str = None):
         """
-        Инициализация и запуск REST API
+        REST метод снятия блокировки канала, отключенного защитой
+        """
+        data = await request.json()
+        if 'channel' not in data:
+            return web.Response(text=json.dumps({'error': 'You need to pass channel as body!'}), status=400)
+        if type(data['channel']) is not int or data['channel'] not in POWER_SUPPLY_CHANNEL_LIMITATIONS:
+            return web.Response(text=json.dumps(
+                {'error': f'Available channels: {list(POWER_SUPPLY_CHANNEL_LIMITATIONS.keys())}!'}), status=400)
+
+        self.interface.unlock_channel(data['channel'])
+
+        return web.Response(status=200)
+
+    @staticmethod
+    async def wait_disconnect(request):
+        """
+        Дождаться отключения клиента. aiohttp не прерывает обработчик при отключении, пока тот не пишет в ответ
+        """
+        while request.transport is not None and not request.transport.is_closing():
+            await asyncio.sleep(SEQUENCE_DISCONNECT_CHECK_INTERVAL)
+
+    async def run_sequence(self, request, uid: str = None):
+        """
+        REST метод выполнения последовательности шагов на стороне драйвера.
+        Прогресс и итоговая статистика ошибок расписания отдаются потоком JSON объектов, по одному на строку
+        """
+        data = await request.json()
+        if 'steps' not in data:
+            return web.Response(text=json.dumps({'error': 'You need to pass steps as body!'}), status=400)
+
+        try:
+            sequence = Sequence(data['steps'])
+        except SequenceValidationException as e:
+            return web.Response(text=json.dumps({'error': str(e)}), status=400)
+
+        if self.sequence_task is not None and not self.sequence_task.done():
+            return web.Response(text=json.dumps({'error': 'Another sequence is running!'}), status=409)
+
+        response = web.StreamResponse(status=200)
+        response.content_type = 'application/x-ndjson'
+        # Заголовки потокового ответа отправляются до выхода из метода, поэтому middleware их уже не добавит
+        response.headers['Method-Routing'] = self.run_sequence.__name__
+        response.headers['Uuid'] = uid
+        await response.prepare(request)
+
+        progress = asyncio.Queue()
+        runner_task = asyncio.create_task(SequenceRunner(self.interface, sequence).run(progress=progress, uuid=uid))
+        self.sequence_task = runner_task
+        # Сигнал окончания потока на случай, если исполнение прервано исключением
+        runner_task.add_done_callback(lambda _: progress.put_nowait(None))
+        # Отключение клиента прерывает последовательность: без наблюдателя она не выполняется
+        disconnect_task = asyncio.create_task(self.wait_disconnect(request))
+        try:
+            while True:
+                event_task = asyncio.create_task(progress.get())
+                await asyncio.wait({event_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+                if not event_task.done():
+                    event_task.cancel()
+                    raise ConnectionResetError('Client disconnected')
+                if (event := event_task.result()) is None:
+                    break
+                await response.write((json.dumps(event) + '\n').encode())
+        except asyncio.CancelledError:
+            runner_task.cancel()
+            raise
+        except ConnectionResetError:
+            runner_task.cancel()
+            return response
+        finally:
+            disconnect_task.cancel()
+
+        await runner_task
+        await response.write_eof()
+        return response
+
+    def create_rest_api(self) -> web.Application:
+        """
+        Инициализация REST API
         """
         rest_api = web.Application(
             middlewares=[
@@ -107,16 +173,25 @@ class Driver:
         rest_api.add_routes([
             web.get('/', self.telemetry),
             web.post('/channel_on', self.turn_channel_on),
-            web.post('/channel_off', self.turn_channel_off)
+            web.post('/channel_off', self.turn_channel_off),
+            web.post('/sequence', self.run_sequence),
+            web.post('/protection_reset', self.reset_protection),
         ])
 
-        await web._run_app(rest_api, port=REST_API_PORT, print=lambda _: None)
+        return rest_api
+
+    async def start_rest_api(self):
+        """
+        Запуск REST API
+        """
+        await web._run_app(self.create_rest_api(), port=REST_API_PORT, print=lambda _: None)
 
     async def run(self):
         """
-        Запуск сбора телеметрии и REST API
+        Запуск сбора телеметрии, проверки правил защиты и REST API
         """
         await asyncio.gather(
             self.gather_telemetry(),
+            self.watch_protection(),
             self.start_rest_api(),
         )
@@ -0,0 +1,18 @@
+class DriverBaseException(Exception):
+    ...
+
+
+class SequenceValidationException(DriverBaseException):
+    ...
+
+
+class SequenceConditionTimeoutException(DriverBaseException):
+    ...
+
+
+class SequenceAbortedException(DriverBaseException):
+    ...
+
+
+class ProtectionConfigurationException(DriverBaseException):
+    ...
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+
+from high_level_interface import IHighInterface
+from settings import (DRIVER_TELEMETRY_DELAY, DRIVER_SHOW_TELEMETRY, DRIVER_TELEMETRY_LOG_FILENAME,
+                      DRIVER_PROTECTION_RULES, DRIVER_PROTECTION_DELAY)
+from .protection import ProtectionMonitor
+
+
+class HeadlessDriver:
+    """
+    Драйвер только со сбором телеметрии, без REST API (и без импорта aiohttp)
+    """
+    def __init__(self, interface: IHighInterface, protection_rules: dict = None):
+        self.interface = interface
+        self.protection = ProtectionMonitor(DRIVER_PROTECTION_RULES if protection_rules is None else protection_rules)
+
+    async def protect(self, telemetry: dict) -> list:
+        """
+        Проверить снимок телеметрии по правилам защиты. Сработавшие каналы блокируются от включения и отключаются
+        """
+        trips = self.protection.check(telemetry)
+        for channel in dict.fromkeys(trip['channel'] for trip in trips):
+            # Блокировка до отключения, чтобы идущая последовательность или REST запрос не включили канал обратно
+            self.interface.lock_channel(channel)
+            try:
+                await self.interface.turn_off_channel(channel)
+            except Exception as e:
+                # Канал остается заблокированным, отключение повторится на следующей проверке, пока правило срабатывает
+                self.log_protection_error(f'Failed to turn off channel {channel}: {e!r}')
+        return trips
+
+    @staticmethod
+    def log_protection_error(message: str):
+        print(f'PROTECTION: {message}')
+        with open(DRIVER_TELEMETRY_LOG_FILENAME, 'a') as file:
+            file.write(f'{datetime.strftime(datetime.now(), "%Y.%m.%d %H-%M-%S-%f")} Protection error:\n')
+            file.write(f'    {message}\n\n\n')
+
+    async def watch_protection(self):
+        """
+        Метод проверки правил защиты с собственным, более частым чем сбор телеметрии, интервалом
+        """
+        if not self.protection.rules:
+            return
+
+        while True:
+            # Ошибка одной проверки не должна останавливать защиту и вместе с ней весь драйвер
+            try:
+                trips = await self.protect(await self.interface.get_telemetry())
+            except Exception as e:
+                self.log_protection_error(f'Protection check failed: {e!r}')
+                trips = []
+            if trips:
+                with open(DRIVER_TELEMETRY_LOG_FILENAME, 'a') as file:
+                    file.write(f'{datetime.strftime(datetime.now(), "%Y.%m.%d %H-%M-%S-%f")} Protection:\n')
+                    self.write_trips(file, trips)
+                    file.write('\n\n')
+            await asyncio.sleep(DRIVER_PROTECTION_DELAY)
+
+    @staticmethod
+    def write_trips(file, trips: list):
+        for trip in trips:
+            file.write(f'    Protection trip on channel {trip["channel"]}: {trip["rule"]} '
+                       f'(value {trip["value"]}, limit {trip["limit"]}), channel turned OFF and locked\n')
+
+    async def poll_telemetry(self) -> dict:
+        """
+        Один сеанс сбора телеметрии: проверка правил защиты и сохранение состояния каналов в файл
+        """
+        tele_task = asyncio.create_task(self.interface.get_telemetry())
+        await tele_task
+
+        # Отключение каналов по сработавшей защите до логгирования, чтобы не задерживать реакцию
+        trips = await self.protect(tele_task.result())
+
+        if DRIVER_SHOW_TELEMETRY:
+            print(tele_task.result())
+        with open(DRIVER_TELEMETRY_LOG_FILENAME, 'a') as file:
+            file.write(f'{datetime.strftime(datetime.now(), "%Y.%m.%d %H-%M-%S-%f")} Telemetry:\n')
+            for key, data in tele_task.result().items():
+                file.write(f'    Channel {key}:\n')
+                file.write(f'        State: {data["state"]}\n')
+                file.write(f'        Current: {data["current"]}A\n')
+                file.write(f'        Voltage: {data["voltage"]}V\n')
+                file.write(f'        Power: {data["power"]}W\n')
+                file.write(f'        Timestamp: {data["timestamp"]}\n')
+            self.write_trips(file, trips)
+            file.write('\n\n')
+
+        return tele_task.result()
+
+    async def gather_telemetry(self):
+        """
+        Метод сбора и сохранения телеметрии с состоянием каналов блока питания в файл
+        """
+        while True:
+            await self.poll_telemetry()
+            await asyncio.sleep(DRIVER_TELEMETRY_DELAY)
+
+    async def run(self):
+        """
+        Запуск сбора телеметрии и проверки правил защиты
+        """
+        await asyncio.gather(
+            self.gather_telemetry(),
+            self.watch_protection(),
+        )
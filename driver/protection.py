@@ -0,0 +1,96 @@
+import math
+import time
+from collections import deque
+
+from settings import POWER_SUPPLY_CHANNEL_LIMITATIONS, DRIVER_PROTECTION_TRIP_LOG_BUFFER_SIZE
+from .exceptions import ProtectionConfigurationException
+
+# Соответствие правила защиты, проверяемой величины канала и условия срабатывания
+RULES = {
+    'over_current': ('current', lambda value, limit: value > limit),
+    'over_power': ('power', lambda value, limit: value > limit),
+    'voltage_window': ('voltage', lambda value, limit: not limit[0] <= value <= limit[1]),
+    'voltage_rate': ('voltage_rate', lambda value, limit: abs(value) > limit),
+    'current_rate': ('current_rate', lambda value, limit: abs(value) > limit),
+}
+
+
+class ProtectionMonitor:
+    """
+    Проверка снимка телеметрии по правилам защиты каналов. Правила раскладываются в плоский список при создании, чтобы
+    на каждом снимке проверять их за один проход без разбора конфигурации
+    """
+
+    def __init__(self, rules: dict):
+        self.rules = []  # Плоский список (канал, правило, проверяемая величина, условие, порог)
+        for channel, channel_rules in rules.items():
+            if channel not in POWER_SUPPLY_CHANNEL_LIMITATIONS:
+                raise ProtectionConfigurationException(
+                    f'Available channels: {list(POWER_SUPPLY_CHANNEL_LIMITATIONS.keys())}!')
+            if not isinstance(channel_rules, dict):
+                raise ProtectionConfigurationException(f'Channel {channel}: rules must be a dict of rule: limit!')
+            for rule, limit in channel_rules.items():
+                if rule not in RULES:
+                    raise ProtectionConfigurationException(f'Available rules: {list(RULES.keys())}!')
+                self.validate_limit(channel, rule, limit)
+                self.rules.append((channel, rule, *RULES[rule], limit))
+
+        self.previous = {}  # Последние измерения включенных каналов для расчета скорости изменения
+        self.trips = deque(maxlen=DRIVER_PROTECTION_TRIP_LOG_BUFFER_SIZE)  # История срабатываний
+
+    @staticmethod
+    def validate_limit(channel: int, rule: str, limit):
+        """
+        Проверить порог правила: число для пороговых правил и правил скорости, упорядоченная пара чисел для окна
+        напряжения
+        """
+        def is_number(value) -> bool:
+            return not isinstance(value, bool) and isinstance(value, (int, float)) and math.isfinite(value)
+
+        if rule == 'voltage_window':
+            if not (isinstance(limit, (tuple, list)) and len(limit) == 2 and all(map(is_number, limit))
+                    and limit[0] <= limit[1]):
+                raise ProtectionConfigurationException(
+                    f'Channel {channel}: {rule} limit must be an ordered pair (min V, max V)!')
+        elif not is_number(limit) or limit < 0:
+            raise ProtectionConfigurationException(f'Channel {channel}: {rule} limit must be a non-negative number!')
+
+    def get_measures(self, telemetry: dict, now: float) -> dict:
+        """
+        Собрать проверяемые величины по включенным каналам, включая скорость изменения напряжения и тока
+        """
+        measures = {}
+        for channel, data in telemetry.items():
+            if data['state'] != 'ON':
+                continue
+            measures[channel] = {'current': data['current'], 'voltage': data['voltage'], 'power': data['power']}
+            if channel in self.previous:
+                previous_time, previous = self.previous[channel]
+                elapsed = now - previous_time
+                if elapsed > 0:
+                    measures[channel]['voltage_rate'] = (data['voltage'] - previous['voltage']) / elapsed
+                    measures[channel]['current_rate'] = (data['current'] - previous['current']) / elapsed
+
+        self.previous = {channel: (now, measure) for channel, measure in measures.items()}
+        return measures
+
+    def check(self, telemetry: dict) -> list:
+        """
+        Проверить снимок телеметрии и вернуть список сработавших правил
+        """
+        if not self.rules:
+            return []
+
+        now = time.monotonic()
+        measures = self.get_measures(telemetry, now)
+        trips = [
+            {'channel': channel, 'rule': rule, 'value': measures[channel][parameter], 'limit': limit}
+            for channel, rule, parameter, condition, limit in self.rules
+            if parameter in measures.get(channel, {}) and condition(measures[channel][parameter], limit)
+        ]
+
+        # Отключенный защитой канал при следующем включении не должен считать скорость от старого значения
+        for trip in trips:
+            self.previous.pop(trip['channel'], None)
+        self.trips.extend(trips)
+        return trips
@@ -0,0 +1,280 @@
+import asyncio
+import math
+import operator
+import time
+
+from high_level_interface import IHighInterface
+from settings import (POWER_SUPPLY_CHANNEL_LIMITATIONS, SEQUENCE_MAX_COMMANDS, SEQUENCE_MAX_WAIT,
+                      SEQUENCE_DEFAULT_POLL_INTERVAL, SEQUENCE_MIN_POLL_INTERVAL, SEQUENCE_MIN_RAMP_STEP,
+                      SEQUENCE_SPIN_THRESHOLD)
+from .exceptions import SequenceValidationException, SequenceConditionTimeoutException, SequenceAbortedException
+
+# Соответствие условия шага wait_until и функции сравнения измеренной величины с заданной
+CONDITIONS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+# Соответствие параметра канала и ключа ограничения в channel_limitations
+LIMITED_PARAMETERS = {
+    'voltage': 'V',
+    'current': 'A',
+}
+
+MEASURED_PARAMETERS = ('voltage', 'current', 'power')
+
+
+class Sequence:
+    """
+    Декларативная последовательность шагов управления каналами (set, on, off, wait, ramp, wait_until).
+    При создании шаги валидируются по ограничениям каналов и компилируются в список операций с временными смещениями
+    """
+
+    def __init__(self, steps: list, channel_limitations: dict = None):
+        self.channel_limitations = channel_limitations or POWER_SUPPLY_CHANNEL_LIMITATIONS
+        self.operations = []  # Скомпилированные операции: command, delay, wait_until
+        self.channels = set()  # Каналы, затрагиваемые последовательностью
+
+        if not isinstance(steps, list) or not steps:
+            raise SequenceValidationException('Sequence steps must be a non-empty list!')
+
+        for index, step in enumerate(steps):
+            if not isinstance(step, dict) or 'action' not in step:
+                raise SequenceValidationException(f'Step {index}: every step must be an object with an action!')
+            compiler = getattr(self, f'compile_{step["action"]}', None)
+            if compiler is None:
+                raise SequenceValidationException(f'Step {index}: unknown action {step["action"]}!')
+            compiler(index, step)
+
+        commands_count = sum(1 for operation in self.operations if operation['type'] != 'delay')
+        if commands_count > SEQUENCE_MAX_COMMANDS:
+            raise SequenceValidationException(f'Sequence is too long: {commands_count} commands, '
+                                              f'max is {SEQUENCE_MAX_COMMANDS}!')
+
+    def get_channel(self, index: int, step: dict) -> int:
+        """
+        Получить номер канала из шага с проверкой его наличия в ограничениях
+        """
+        channel = step.get('channel')
+        if type(channel) is not int or channel not in self.channel_limitations:
+            raise SequenceValidationException(
+                f'Step {index}: available channels: {list(self.channel_limitations.keys())}!')
+        self.channels.add(channel)
+        return channel
+
+    @staticmethod
+    def get_number(index: int, step: dict, key: str, minimum: float = 0.0, maximum: float = math.inf) -> float:
+        """
+        Получить конечный числовой параметр шага с проверкой границ
+        """
+        value = step.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise SequenceValidationException(f'Step {index}: {key} must be a finite number!')
+        if value < minimum:
+            raise SequenceValidationException(f'Step {index}: {key} must be >= {minimum}!')
+        if value > maximum:
+            raise SequenceValidationException(f'Step {index}: {key} must be <= {maximum}!')
+        # -0.0 превращается в 0.0, иначе в SCPI команду попадет непарсируемое -0.000000
+        return float(value) + 0.0
+
+    def get_limited_value(self, index: int, step: dict, key: str, channel: int, parameter: str) -> float:
+        """
+        Получить значение тока или напряжения с проверкой по ограничениям канала
+        """
+        value = self.get_number(index, step, key)
+        maximum = self.channel_limitations[channel][LIMITED_PARAMETERS[parameter]]
+        if value > maximum:
+            raise SequenceValidationException(f'Step {index}: {parameter} {value} exceeds channel {channel} '
+                                              f'limit {maximum}!')
+        return value
+
+    def add_command(self, index: int, action: str, method: str, **kwargs):
+        self.operations.append({'type': 'command', 'step': index, 'action': action, 'method': method,
+                                'kwargs': kwargs})
+
+    def add_delay(self, milliseconds: float):
+        if milliseconds:
+            self.operations.append({'type': 'delay', 'seconds': milliseconds / 1000})
+
+    def compile_set(self, index: int, step: dict):
+        channel = self.get_channel(index, step)
+        params = {parameter: self.get_limited_value(index, step, parameter, channel, parameter)
+                  for parameter in LIMITED_PARAMETERS if parameter in step}
+        if not params:
+            raise SequenceValidationException(f'Step {index}: you need to pass voltage and/or current!')
+        self.add_command(index, 'set', 'set_channel_parameters', channel_number=channel, **params)
+
+    def compile_on(self, index: int, step: dict):
+        self.add_command(index, 'on', 'set_channel_state', channel_number=self.get_channel(index, step), state='ON')
+
+    def compile_off(self, index: int, step: dict):
+        self.add_command(index, 'off', 'set_channel_state', channel_number=self.get_channel(index, step), state='OFF')
+
+    def compile_wait(self, index: int, step: dict):
+        self.add_delay(self.get_number(index, step, 'ms', maximum=SEQUENCE_MAX_WAIT))
+
+    def compile_ramp(self, index: int, step: dict):
+        """
+        Развернуть рампу в набор команд set с шагом step и интервалом interval_ms между ними
+        """
+        channel = self.get_channel(index, step)
+        parameter = step.get('parameter', 'voltage')
+        if parameter not in LIMITED_PARAMETERS:
+            raise SequenceValidationException(f'Step {index}: ramp parameter must be one of '
+                                              f'{list(LIMITED_PARAMETERS.keys())}!')
+        start = self.get_limited_value(index, step, 'start', channel, parameter)
+        stop = self.get_limited_value(index, step, 'stop', channel, parameter)
+        increment = self.get_number(index, step, 'step', minimum=SEQUENCE_MIN_RAMP_STEP)
+        interval = self.get_number(index, step, 'interval_ms', maximum=SEQUENCE_MAX_WAIT)
+
+        points = abs(stop - start) / increment + 1e-9
+        if points + 1 > SEQUENCE_MAX_COMMANDS:
+            raise SequenceValidationException(f'Step {index}: ramp is too long!')
+        points_count = int(points)
+
+        direction = 1 if stop >= start else -1
+        values = [round(start + direction * point * increment, 6) + 0.0 for point in range(points_count + 1)]
+        if values[-1] != stop:
+            values.append(stop)
+
+        for number, value in enumerate(values):
+            if number:
+                self.add_delay(interval)
+            self.add_command(index, 'ramp', 'set_channel_parameters', channel_number=channel, **{parameter: value})
+
+    def compile_wait_until(self, index: int, step: dict):
+        channel = self.get_channel(index, step)
+        parameter = step.get('parameter')
+        if parameter not in MEASURED_PARAMETERS:
+            raise SequenceValidationException(f'Step {index}: wait_until parameter must be one of '
+                                              f'{list(MEASURED_PARAMETERS)}!')
+        condition = step.get('condition')
+        if condition not in CONDITIONS:
+            raise SequenceValidationException(f'Step {index}: wait_until condition must be one of '
+                                              f'{list(CONDITIONS.keys())}!')
+        poll_interval = SEQUENCE_DEFAULT_POLL_INTERVAL
+        if 'poll_interval_ms' in step:
+            poll_interval = self.get_number(index, step, 'poll_interval_ms', minimum=SEQUENCE_MIN_POLL_INTERVAL,
+                                            maximum=SEQUENCE_MAX_WAIT)
+
+        self.operations.append({
+            'type': 'wait_until',
+            'step': index,
+            'action': 'wait_until',
+            'channel_number': channel,
+            'parameter': parameter,
+            'condition': condition,
+            'value': self.get_number(index, step, 'value', minimum=-math.inf),
+            'timeout': self.get_number(index, step, 'timeout_ms', maximum=SEQUENCE_MAX_WAIT) / 1000,
+            'poll_interval': poll_interval / 1000,
+        })
+
+
+class SequenceRunner:
+    """
+    Исполнитель последовательности по монотонным часам. Каждая команда привязана к абсолютному дедлайну от начала
+    последовательности, поэтому задержки отдельных шагов не накапливаются. После успешного wait_until расписание
+    отсчитывается от момента выполнения условия
+    """
+
+    def __init__(self, interface: IHighInterface, sequence: Sequence):
+        self.interface = interface
+        self.sequence = sequence
+        self.timing_errors = []  # Опоздания команд относительно расписания в секундах
+
+    @staticmethod
+    async def sleep_until(deadline: float):
+        """
+        Дождаться дедлайна: большую часть времени спать, последние SEQUENCE_SPIN_THRESHOLD секунд - отдавать управление
+        циклу событий без сна, чтобы не зависеть от гранулярности таймеров
+        """
+        remaining = deadline - time.monotonic()
+        if remaining > SEQUENCE_SPIN_THRESHOLD:
+            await asyncio.sleep(remaining - SEQUENCE_SPIN_THRESHOLD)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0)
+
+    def check_not_locked(self):
+        """
+        Прервать последовательность, если защита заблокировала любой из затрагиваемых ею каналов
+        """
+        locked = self.sequence.channels & self.interface.locked_channels
+        if locked:
+            raise SequenceAbortedException(f'Channels {sorted(locked)} are locked by protection!')
+
+    async def wait_condition(self, operation: dict, uuid: str = None) -> dict:
+        """
+        Опрашивать канал до выполнения условия или истечения таймаута. Между опросами - обычный sleep, точность
+        расписания здесь не нужна
+        """
+        compare = CONDITIONS[operation['condition']]
+        deadline = time.monotonic() + operation['timeout']
+        while True:
+            self.check_not_locked()
+            telemetry = await self.interface.get_channel_telemetry(operation['channel_number'], uuid=uuid)
+            if compare(telemetry[operation['parameter']], operation['value']):
+                return telemetry
+            if time.monotonic() >= deadline:
+                raise SequenceConditionTimeoutException(
+                    f'Step {operation["step"]}: channel {operation["channel_number"]} {operation["parameter"]} '
+                    f'{operation["condition"]} {operation["value"]} was not reached in {operation["timeout"]}s!')
+            await asyncio.sleep(min(operation['poll_interval'], deadline - time.monotonic()))
+
+    def get_statistics(self, started: float) -> dict:
+        """
+        Статистика ошибок расписания в миллисекундах
+        """
+        errors = [error * 1000 for error in self.timing_errors]
+        return {
+            'commands': len(errors),
+            'duration_ms': (time.monotonic() - started) * 1000,
+            'mean_error_ms': sum(errors) / len(errors) if errors else 0.0,
+            'max_error_ms': max(errors, default=0.0),
+            'min_error_ms': min(errors, default=0.0),
+        }
+
+    async def run(self, progress: asyncio.Queue = None, uuid: str = None) -> dict:
+        """
+        Выполнить последовательность. Прогресс по каждой команде кладется в очередь progress без ожидания, чтобы
+        отправка клиенту не сбивала расписание. Возвращает итоговое событие со статистикой
+        """
+        self.timing_errors = []
+        started = time.monotonic()
+        base, offset = started, 0.0
+
+        def report(event: dict):
+            if progress is not None:
+                progress.put_nowait(event)
+
+        try:
+            for operation in self.sequence.operations:
+                if operation['type'] == 'delay':
+                    offset += operation['seconds']
+                    continue
+
+                deadline = base + offset
+                await self.sleep_until(deadline)
+                self.check_not_locked()
+                error = time.monotonic() - deadline
+                self.timing_errors.append(error)
+
+                if operation['type'] == 'wait_until':
+                    telemetry = await self.wait_condition(operation, uuid=uuid)
+                    base, offset = time.monotonic(), 0.0
+                    report({'event': 'step', 'step': operation['step'], 'action': operation['action'],
+                            'error_ms': error * 1000, 'telemetry': telemetry})
+                    continue
+
+                await getattr(self.interface, operation['method'])(**operation['kwargs'], uuid=uuid)
+                report({'event': 'step', 'step': operation['step'], 'action': operation['action'],
+                        'error_ms': error * 1000, **operation['kwargs']})
+        except Exception as e:
+            # Ошибка интерфейса или невыполненное условие прерывают последовательность, но итог отдается всегда
+            result = {'event': 'error', 'error': str(e), 'statistics': self.get_statistics(started)}
+        else:
+            result = {'event': 'done', 'statistics': self.get_statistics(started)}
+
+        report(result)
+        return result
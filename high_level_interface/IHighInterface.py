@@ -1,6 +1,7 @@
 from abc import ABC
 
 from low_level_interface import ILowInterface
+from .exceptions import ChannelLockedException
 
 
 class IHighInterface(ABC):
@@ -10,11 +11,26 @@ class IHighInterface(ABC):
     """
     def __init__(self, low_interface: ILowInterface):
         self.low_interface = low_interface
+        self.locked_channels = set()  # Каналы, отключенные защитой, включение которых запрещено до сброса
+
+    def lock_channel(self, channel_number: int):
+        self.locked_channels.add(channel_number)
+
+    def unlock_channel(self, channel_number: int):
+        self.locked_channels.discard(channel_number)
+
+    def check_channel_unlocked(self, channel_number: int):
+        if channel_number in self.locked_channels:
+            raise ChannelLockedException(f'Channel {channel_number} is locked by protection!')
 
     async def get_telemetry(self, uuid: str = None):
         return {channel + 1: self.low_interface.send_text(f':MEASure{channel + 1}:ALL', uuid=uuid) for channel in range(4)}
 
+    async def get_channel_telemetry(self, channel_number: int, uuid: str = None):
+        return self.low_interface.send_text(f':MEASure{channel_number}:ALL', uuid=uuid)
+
     async def turn_on_channel(self, channel_number: int, voltage: float, current: float, uuid: str = None):
+        self.check_channel_unlocked(channel_number)
         root = f':SOURce{channel_number}'
         # Set channel current level
         self.low_interface.send_text(f'{root}:CURRent {current}', uuid=uuid)
@@ -28,3 +44,20 @@ class IHighInterface(ABC):
     async def turn_off_channel(self, channel_number, uuid: str = None):
         # Set channel state to OFF
         self.low_interface.send_text(f':OUTPut{channel_number}:STATe OFF', uuid=uuid)
+
+    async def set_channel_parameters(self, channel_number: int, voltage: float = None, current: float = None,
+                                     uuid: str = None):
+        root = f':SOURce{channel_number}'
+        if current is not None:
+            # Set channel current level
+            self.low_interface.send_text(f'{root}:CURRent {current:.6f}', uuid=uuid)
+
+        if voltage is not None:
+            # Set channel voltage level
+            self.low_interface.send_text(f'{root}:VOLTage {voltage:.6f}', uuid=uuid)
+
+    async def set_channel_state(self, channel_number: int, state: str, uuid: str = None):
+        if state == 'ON':
+            self.check_channel_unlocked(channel_number)
+        # Set channel state to ON/OFF
+        self.low_interface.send_text(f':OUTPut{channel_number}:STATe {state}', uuid=uuid)
@@ -0,0 +1,6 @@
+class HighInterfaceBaseException(Exception):
+    ...
+
+
+class ChannelLockedException(HighInterfaceBaseException):
+    ...
@@ -1,2 +1,4 @@
 from .ILowInterface import ILowInterface
-from .mocked_interface import MockedInterface
\ No newline at end of file
+from .mocked_interface import MockedInterface
+from .recording_interface import RecordingInterface, load_recording
+from .replay_interface import ReplayInterface
\ No newline at end of file
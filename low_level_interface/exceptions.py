@@ -7,4 +7,20 @@ class InterfaceInitializationException(InterfaceBaseException):
 
 
 class NotEnoughParamsException(InterfaceInitializationException):
-    ...
\ No newline at end of file
+    ...
+
+
+class WrongParamsException(InterfaceInitializationException):
+    ...
+
+
+class ReplayException(InterfaceBaseException):
+    ...
+
+
+class ReplayMismatchException(ReplayException):
+    ...
+
+
+class ReplayExhaustedException(ReplayException):
+    ...
@@ -0,0 +1,92 @@
+import atexit
+import gzip
+import json
+import threading
+import time
+
+from settings import LOW_INTERFACE_RECORD_FILENAME, LOW_INTERFACE_RECORD_FLUSH_INTERVAL
+from .ILowInterface import ILowInterface
+from .exceptions import NotEnoughParamsException
+
+
+def load_recording(filename: str) -> list:
+    """
+    Прочитать файл записи обмена с устройством.
+    Каждая запись - [время с предыдущей команды (с), время ответа устройства (с), команда, ответ]
+    """
+    records = []
+    with gzip.open(filename, 'rt') as file:
+        try:
+            for line in file:
+                if line.strip():
+                    records.append(json.loads(line))
+        except EOFError:
+            # Файл оборван (процесс записи был убит) - записи до последнего сброса на диск читаются
+            pass
+    return records
+
+
+class RecordingInterface(ILowInterface):
+    """
+    Обертка над любым низкоуровневым интерфейсом, записывающая каждую команду, ответ, интервал между командами и
+    время ответа в сжатый файл (gzip, по одному компактному JSON массиву на строку).
+    Файл создается заново при создании обертки, после переподключения запись дописывается в него.
+    Каждая запись сбрасывается на диск не позже чем через LOW_INTERFACE_RECORD_FLUSH_INTERVAL секунд по таймеру, при
+    завершении процесса файл закрывается
+    """
+    def __init__(self, host: str, port: int, *args, **kwargs):
+        super().__init__(host, port, *args, **kwargs)
+
+        if 'low_interface' not in kwargs:
+            raise NotEnoughParamsException('You need to give a low interface object for recording!!')
+
+        self._low_interface: ILowInterface = kwargs['low_interface']
+        self.record_filename = kwargs.get('record_filename', LOW_INTERFACE_RECORD_FILENAME)
+        self._record_file = gzip.open(self.record_filename, 'wt')
+        self._record_lock = threading.Lock()  # Запись и сброс по таймеру идут из разных потоков
+        self._flush_timer = None
+        self._last_command_time = None
+
+        atexit.register(self.close_record)
+
+    def connect(self):
+        self._low_interface.connect()
+
+    def send_text(self, command: str, uuid: str = None) -> str:
+        started = time.monotonic()
+        answer = self._low_interface.send_text(command, uuid=uuid)
+        latency = time.monotonic() - started
+
+        arrival = started - self._last_command_time if self._last_command_time is not None else 0.0
+        self._last_command_time = started
+
+        with self._record_lock:
+            if self._record_file is None:
+                self._record_file = gzip.open(self.record_filename, 'at')
+            self._record_file.write(json.dumps([arrival, latency, command, answer], separators=(',', ':')) + '\n')
+
+            # Сброс по таймеру, а не по следующей команде: иначе последняя пачка команд ждала бы следующего опроса
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(LOW_INTERFACE_RECORD_FLUSH_INTERVAL, self.flush_record)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return answer
+
+    def flush_record(self):
+        with self._record_lock:
+            self._flush_timer = None
+            if self._record_file is not None:
+                self._record_file.flush()
+
+    def close_record(self):
+        with self._record_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._record_file is not None:
+                self._record_file.close()
+                self._record_file = None
+
+    def disconnect(self):
+        self.close_record()
+        self._low_interface.disconnect()
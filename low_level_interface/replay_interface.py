@@ -0,0 +1,68 @@
+import math
+import time
+from collections import deque
+
+from settings import LOW_INTERFACE_RECORD_FILENAME
+from .ILowInterface import ILowInterface
+from .exceptions import ReplayMismatchException, ReplayExhaustedException, WrongParamsException
+from .recording_interface import load_recording
+
+
+class ReplayInterface(ILowInterface):
+    """
+    Низкоуровневый интерфейс, воспроизводящий ответы из файла записи RecordingInterface с исходным или
+    масштабированным (time_scale) временем ответа устройства.
+    В строгом режиме команды должны приходить в записанном порядке, иначе ответ берется из очереди ответов на такую же
+    команду, что позволяет прогонять записанную нагрузку на драйвере с измененным порядком команд
+    """
+    def __init__(self, host: str, port: int, *args, **kwargs):
+        super().__init__(host, port, *args, **kwargs)
+
+        self.record_filename = kwargs.get('record_filename', LOW_INTERFACE_RECORD_FILENAME)
+        self.time_scale = kwargs.get('time_scale', 1.0)
+        self.strict = kwargs.get('strict', True)
+
+        if (isinstance(self.time_scale, bool) or not isinstance(self.time_scale, (int, float))
+                or not math.isfinite(self.time_scale) or self.time_scale < 0):
+            raise WrongParamsException('time_scale must be a finite number >= 0!')
+
+        self.records = load_recording(self.record_filename)
+        self._queue = deque(self.records)
+        self._queues_by_command = {}
+        for record in self.records:
+            self._queues_by_command.setdefault(record[2], deque()).append(record)
+
+    def connect(self):
+        pass
+
+    def send_text(self, command: str, uuid: str = None) -> str:
+        if self.strict:
+            if not self._queue:
+                raise ReplayExhaustedException(f'Recording {self.record_filename} is over!')
+            # Запись снимается с очереди только при совпадении, чтобы ошибка не сдвигала все следующие команды
+            _, latency, recorded_command, answer = self._queue[0]
+            if recorded_command != command:
+                raise ReplayMismatchException(f'Expected {recorded_command}, got {command}!')
+            self._queue.popleft()
+        else:
+            if not self._queues_by_command.get(command):
+                raise ReplayExhaustedException(f'No more recorded answers for {command}!')
+            _, latency, _, answer = self._queues_by_command[command].popleft()
+
+        if self.time_scale:
+            time.sleep(latency * self.time_scale)
+        return answer
+
+    def disconnect(self):
+        pass
+
+    def get_arrival_times(self) -> list:
+        """
+        Моменты отправки команд относительно первой команды с учетом time_scale - для воспроизведения исходного
+        профиля нагрузки в бенчмарке
+        """
+        arrival_times, moment = [], 0.0
+        for arrival, *_ in self.records:
+            moment += arrival * self.time_scale
+            arrival_times.append(moment)
+        return arrival_times
@@ -1,7 +1,7 @@
 from datetime import datetime
 from functools import wraps
 
-from settings import SCPI_COMMAND_TRANSLATION_LOGS, IMITATOR_ACTION_EXECUTION_LOGS
+from settings import SCPI_COMMAND_TRANSLATION_LOGS, IMITATOR_ACTION_EXECUTION_LOGS, POWER_SUPPLY_CHANNEL_LIMITATIONS
 from .scpi_translator import SCPITranslator
 
 
@@ -12,24 +12,7 @@ class PowerSupplyImitator:
     """
 
     # Ограничения по току и напряжению по каналам
-    channel_limitations = {
-        1: {
-            'V': 32.0,
-            'A': 3.0
-        },
-        2: {
-            'V': 32.0,
-            'A': 3.0
-        },
-        3: {
-            'V': 5.0,
-            'A': 1.0
-        },
-        4: {
-            'V': 15.0,
-            'A': 1.0
-        },
-    }
+    channel_limitations = POWER_SUPPLY_CHANNEL_LIMITATIONS
 
     def __init__(self):
         # Установка начального состояния модели
@@ -16,37 +16,53 @@ class SCPIVariableType(Enum):
 class SCPITranslator:
     """
     Транслятор текстовых SCPI команд в конечный метод с парсингом параметров из команды с использованием дерева
-    команд SCPI протокола
+    команд SCPI протокола.
+    Дерево строится один раз и общее для всех экземпляров транслятора, поэтому изменять его через экземпляр нельзя
     """
 
+    default_root_node = None  # Вершина дерева команд по умолчанию, общая для всех экземпляров транслятора
+
     def __init__(self):
-        self.root_node = Node('')  # Вершина дерева
-        self.create_default_tree()
+        self.root_node = self.get_default_tree()
 
-    def create_default_tree(self):
+    @classmethod
+    def get_default_tree(cls):
+        """
+        Вернуть общее дерево команд, построив его при первом обращении
+        """
+        if cls.default_root_node is None:
+            cls.default_root_node = cls.create_default_tree()
+        return cls.default_root_node
+
+    @classmethod
+    def create_default_tree(cls):
         """
         Создать дерево команд SCPI протокола
         """
-        self.add_node('SOURce', variable_type=SCPIVariableType.Integer, variable_name='channel')
-        self.add_node('CURRent', parent='SOURce', variable_type=SCPIVariableType.Float, variable_name='current',
-                      operation='set_current')
-        self.add_node('VOLTage', parent='SOURce', variable_type=SCPIVariableType.Float, variable_name='voltage',
-                      operation='set_voltage')
-        self.add_node('OUTPut', variable_type=SCPIVariableType.Integer, variable_name='channel')
-        self.add_node('STATe', parent='OUTPut', variable_type=SCPIVariableType.State, variable_name='state',
-                      operation='set_channel')
-        self.add_node('MEASure', variable_type=SCPIVariableType.Integer, variable_name='channel')
-        self.add_node('ALL', parent='MEASure', operation='get_all_measure_from_channel')
+        root_node = Node('')  # Вершина дерева
+        cls.add_node(root_node, 'SOURce', variable_type=SCPIVariableType.Integer, variable_name='channel')
+        cls.add_node(root_node, 'CURRent', parent='SOURce', variable_type=SCPIVariableType.Float,
+                     variable_name='current', operation='set_current')
+        cls.add_node(root_node, 'VOLTage', parent='SOURce', variable_type=SCPIVariableType.Float,
+                     variable_name='voltage', operation='set_voltage')
+        cls.add_node(root_node, 'OUTPut', variable_type=SCPIVariableType.Integer, variable_name='channel')
+        cls.add_node(root_node, 'STATe', parent='OUTPut', variable_type=SCPIVariableType.State, variable_name='state',
+                     operation='set_channel')
+        cls.add_node(root_node, 'MEASure', variable_type=SCPIVariableType.Integer, variable_name='channel')
+        cls.add_node(root_node, 'ALL', parent='MEASure', operation='get_all_measure_from_channel')
 
         if SCPI_TREE_SHOW:
             print('SCPI commands tree:')
-            self.root_node.print_tree()
+            root_node.print_tree()
+
+        return root_node
 
-    def add_node(self, tag, parent='', variable_type=None, variable_name=None, operation=None):
+    @staticmethod
+    def add_node(root_node, tag, parent='', variable_type=None, variable_name=None, operation=None):
         """
         Добавить нового потомка ноде, определенной её путем в дереве (node1/node5/node25)
         """
-        parent_node = self.root_node
+        parent_node = root_node
         for parent_name in parent.split('/'):
             if not parent_name:
                 continue
@@ -67,7 +83,7 @@ class SCPITranslator:
 
             node = node.get_child(step)
             var = node.process_step(step)
-            if var:
+            if var is not None:
                 result['kwargs'][node.variable_name] = var
 
         result['command'] = node.operation
@@ -6,7 +6,46 @@ IMITATOR_ACTION_EXECUTION_LOGS = False  # Выводить в консоль л
 DRIVER_TELEMETRY_LOG_FILENAME = 'telemetry.logs'  # Название файла хранения логов телеметрии
 DRIVER_TELEMETRY_DELAY = 10  # Время между сеансами сбора телеметрии в секундах
 DRIVER_SHOW_TELEMETRY = False  # Выводить в консоль собранную телеметрию
+DRIVER_HEADLESS_STARTUP_TIME_RATIO = 0.7  # Допустимая доля времени старта headless драйвера от времени старта Driver
+
+# Правила защиты каналов, проверяемые каждые DRIVER_PROTECTION_DELAY секунд и на каждом снимке телеметрии.
+# При срабатывании канал сразу отключается и блокируется от включения до сброса защиты.
+# Доступные правила: over_current (A), over_power (W), voltage_window ((min V, max V)), voltage_rate (V/s),
+# current_rate (A/s). Пример: {1: {'over_current': 2.5, 'voltage_window': (1.0, 30.0), 'voltage_rate': 5.0}}
+DRIVER_PROTECTION_RULES = {}
+DRIVER_PROTECTION_DELAY = 0.1  # Время между проверками правил защиты в секундах (независимо от сбора телеметрии)
+DRIVER_PROTECTION_TRIP_LOG_BUFFER_SIZE = 100  # Размер буфера хранения сработавших правил защиты
 
 LOW_INTERFACE_SENT_COMMAND_LOG_BUFFER_SIZE = 10  # Размер буфера хранения логов переданных SCPI команд
+LOW_INTERFACE_RECORD_FILENAME = 'interface.record.gz'  # Название файла записи обмена с устройством по умолчанию
+LOW_INTERFACE_RECORD_FLUSH_INTERVAL = 1.0  # Как часто сбрасывать запись обмена с устройством на диск в секундах
 
 REST_API_PORT = 8080  # Порт, на котором доступен REST API
+
+# Ограничения по току и напряжению по каналам источника питания GPP-4323
+POWER_SUPPLY_CHANNEL_LIMITATIONS = {
+    1: {
+        'V': 32.0,
+        'A': 3.0
+    },
+    2: {
+        'V': 32.0,
+        'A': 3.0
+    },
+    3: {
+        'V': 5.0,
+        'A': 1.0
+    },
+    4: {
+        'V': 15.0,
+        'A': 1.0
+    },
+}
+
+SEQUENCE_MAX_COMMANDS = 10000  # Максимальное количество команд в одной последовательности (с учетом шагов рампы)
+SEQUENCE_MAX_WAIT = 60000  # Максимальная длительность wait, интервала рампы и таймаута wait_until в миллисекундах
+SEQUENCE_DEFAULT_POLL_INTERVAL = 10  # Интервал опроса условия wait_until по умолчанию в миллисекундах
+SEQUENCE_MIN_POLL_INTERVAL = 1  # Минимальный интервал опроса условия wait_until в миллисекундах
+SEQUENCE_MIN_RAMP_STEP = 1e-6  # Минимальный шаг рампы - разрешение значений в SCPI командах (6 знаков после точки)
+SEQUENCE_DISCONNECT_CHECK_INTERVAL = 0.05  # Как часто проверять отключение клиента от потока последовательности в секундах
+SEQUENCE_SPIN_THRESHOLD = 0.002  # За сколько секунд до дедлайна шага переходить от sleep к активному ожиданию
@@ -1,15 +1,26 @@
 import asyncio
 import copy
 import json
+import os
+import subprocess
+import sys
+import time
 from abc import ABC
 
 import aiohttp
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
 
-from driver import Driver
+from driver import Driver, HeadlessDriver
+from driver.exceptions import SequenceValidationException, ProtectionConfigurationException
+from driver.sequence import Sequence, SequenceRunner
 from high_level_interface import DefaultHighInterface
-from low_level_interface import MockedInterface
+from high_level_interface.exceptions import ChannelLockedException
+from low_level_interface import MockedInterface, RecordingInterface, ReplayInterface, load_recording
+from low_level_interface.exceptions import ReplayMismatchException, ReplayExhaustedException, WrongParamsException
 from power_supply_imitator import PowerSupplyImitator
-from settings import REST_API_PORT
+from power_supply_imitator.scpi_translator import SCPITranslator
+from settings import REST_API_PORT, DRIVER_HEADLESS_STARTUP_TIME_RATIO, DRIVER_PROTECTION_DELAY
 
 
 def get_test_instances() -> (Driver, PowerSupplyImitator):
@@ -158,6 +169,17 @@ class TestDriverRouting(AbstractTestCase):
         assert status_code == 200
         assert headers['Method-Routing'] == 'turn_channel_off'
 
+    async def test_route_sequence(self):
+        status_code, data, headers = await self.get_request_result(
+            f'http://localhost:{REST_API_PORT}/sequence',
+            'post',
+            {'steps': [{'action': 'set', 'channel': 3, 'voltage': 10.0}]}
+        )
+
+        assert status_code == 400
+        assert 'exceeds channel 3 limit' in data['error']
+        assert headers['Method-Routing'] == 'run_sequence'
+
 
 class TestSentSCPICommands(AbstractTestCase):
     """
@@ -191,3 +213,504 @@ class TestSentSCPICommands(AbstractTestCase):
 
         assert status_code == 200
         assert self.low_interface.get_command_logs_by_uuid(headers['uuid']) == [':OUTPut1:STATe OFF']
+
+
+class TestSequence(AbstractTestCase):
+    """
+    Проверка валидации и исполнения последовательностей шагов
+    """
+    async def test_sequence_commands(self):
+        sequence = Sequence([
+            {'action': 'set', 'channel': 3, 'voltage': 3.3, 'current': 0.5},
+            {'action': 'on', 'channel': 3},
+            {'action': 'wait', 'ms': 5},
+            {'action': 'ramp', 'channel': 2, 'parameter': 'voltage', 'start': 0.0, 'stop': 0.3, 'step': 0.1,
+             'interval_ms': 1},
+            {'action': 'off', 'channel': 3},
+        ])
+        result = await SequenceRunner(self.driver.interface, sequence).run(uuid='sequence-commands')
+
+        assert result['event'] == 'done'
+        assert result['statistics']['commands'] == 7
+        assert result['statistics']['duration_ms'] >= 8
+        assert self.low_interface.get_command_logs_by_uuid('sequence-commands') == [':SOURce3:CURRent 0.500000',
+                                                                                  ':SOURce3:VOLTage 3.300000',
+                                                                                  ':OUTPut3:STATe ON',
+                                                                                  ':SOURce2:VOLTage 0.000000',
+                                                                                  ':SOURce2:VOLTage 0.100000',
+                                                                                  ':SOURce2:VOLTage 0.200000',
+                                                                                  ':SOURce2:VOLTage 0.300000',
+                                                                                  ':OUTPut3:STATe OFF']
+
+    async def test_sequence_progress(self):
+        progress = asyncio.Queue()
+        sequence = Sequence([
+            {'action': 'set', 'channel': 4, 'voltage': 12.0, 'current': 0.2},
+            {'action': 'on', 'channel': 4},
+            {'action': 'wait_until', 'channel': 4, 'parameter': 'power', 'condition': '>=', 'value': 2.0,
+             'timeout_ms': 50},
+            {'action': 'off', 'channel': 4},
+        ])
+        await SequenceRunner(self.driver.interface, sequence).run(progress=progress)
+
+        events = [progress.get_nowait() for _ in range(progress.qsize())]
+        assert [event['action'] for event in events[:-1]] == ['set', 'on', 'wait_until', 'off']
+        assert round(events[2]['telemetry']['power'], 6) == 2.4
+        assert events[-1]['event'] == 'done'
+
+    async def test_sequence_condition_timeout(self):
+        sequence = Sequence([
+            {'action': 'wait_until', 'channel': 1, 'parameter': 'voltage', 'condition': '>', 'value': 100.0,
+             'timeout_ms': 5},
+            {'action': 'on', 'channel': 1},
+        ])
+        result = await SequenceRunner(self.driver.interface, sequence).run(uuid='sequence-timeout')
+
+        assert result['event'] == 'error'
+        assert ':OUTPut1:STATe ON' not in self.low_interface.get_command_logs_by_uuid('sequence-timeout')
+
+    async def test_sequence_small_values(self):
+        sequence = Sequence([
+            {'action': 'set', 'channel': 1, 'voltage': 0.00001},
+            {'action': 'ramp', 'channel': 1, 'parameter': 'current', 'start': 0.0, 'stop': 0.00002, 'step': 0.00001,
+             'interval_ms': 0},
+        ])
+        result = await SequenceRunner(self.driver.interface, sequence).run(uuid='sequence-small-values')
+
+        assert result['event'] == 'done'
+        assert self.low_interface.get_command_logs_by_uuid('sequence-small-values') == [':SOURce1:VOLTage 0.000010',
+                                                                                      ':SOURce1:CURRent 0.000000',
+                                                                                      ':SOURce1:CURRent 0.000010',
+                                                                                      ':SOURce1:CURRent 0.000020']
+
+    async def test_sequence_interface_error(self, monkeypatch):
+        driver, _, _ = get_test_instances()
+
+        async def broken_set_channel_parameters(*args, **kwargs):
+            raise ConnectionError('Device is not responding')
+
+        monkeypatch.setattr(driver.interface, 'set_channel_parameters', broken_set_channel_parameters)
+        progress = asyncio.Queue()
+        sequence = Sequence([
+            {'action': 'on', 'channel': 1},
+            {'action': 'set', 'channel': 1, 'voltage': 1.0},
+            {'action': 'off', 'channel': 1},
+        ])
+        result = await SequenceRunner(driver.interface, sequence).run(progress=progress)
+
+        assert result['event'] == 'error'
+        assert 'Device is not responding' in result['error']
+        assert result['statistics']['commands'] == 2
+        assert progress.qsize() == 2
+
+    async def test_sequence_streaming(self):
+        driver, _, imitator = get_test_instances()
+        steps = [
+            {'action': 'set', 'channel': 2, 'voltage': 5.0, 'current': 1.0},
+            {'action': 'on', 'channel': 2},
+            {'action': 'wait', 'ms': 2},
+            {'action': 'off', 'channel': 2},
+        ]
+        async with TestClient(TestServer(driver.create_rest_api())) as client:
+            async with client.post('/sequence', json={'steps': steps}) as resp:
+                events = [json.loads(line) for line in (await resp.text()).splitlines()]
+
+        assert resp.status == 200
+        assert resp.headers['Method-Routing'] == 'run_sequence'
+        assert resp.headers['Uuid']
+        assert resp.content_type == 'application/x-ndjson'
+        assert [event['action'] for event in events[:-1]] == ['set', 'on', 'off']
+        assert events[-1]['event'] == 'done'
+        assert events[-1]['statistics']['commands'] == 3
+        assert imitator.state[2]['state'] == 'OFF'
+
+    async def test_sequence_streaming_abort(self):
+        driver, _, imitator = get_test_instances()
+        steps = [
+            {'action': 'on', 'channel': 3},
+            {'action': 'wait_until', 'channel': 3, 'parameter': 'voltage', 'condition': '>', 'value': 100.0,
+             'timeout_ms': 5},
+            {'action': 'off', 'channel': 3},
+        ]
+        async with TestClient(TestServer(driver.create_rest_api())) as client:
+            async with client.post('/sequence', json={'steps': steps}) as resp:
+                events = [json.loads(line) for line in (await resp.text()).splitlines()]
+
+        assert resp.status == 200
+        assert [event['event'] for event in events] == ['step', 'error']
+        assert 'was not reached' in events[-1]['error']
+        assert 'statistics' in events[-1]
+        assert imitator.state[3]['state'] == 'ON'
+
+    async def test_sequence_negative_zero(self):
+        driver, _, imitator = get_test_instances()
+        sequence = Sequence([
+            {'action': 'on', 'channel': 1},
+            {'action': 'set', 'channel': 1, 'voltage': -0.0},
+            {'action': 'off', 'channel': 1},
+        ])
+        result = await SequenceRunner(driver.interface, sequence).run()
+
+        assert result['event'] == 'done'
+        assert imitator.state[1]['state'] == 'OFF'
+
+    async def test_sequence_overlap_rejected(self):
+        driver, _, _ = get_test_instances()
+        steps = [{'action': 'on', 'channel': 2}, {'action': 'wait', 'ms': 100}, {'action': 'off', 'channel': 2}]
+        async with TestClient(TestServer(driver.create_rest_api())) as client:
+            async with client.post('/sequence', json={'steps': steps}) as first:
+                async with client.post('/sequence', json={'steps': steps}) as second:
+                    assert second.status == 409
+                assert first.status == 200
+                await first.read()
+
+            async with client.post('/sequence', json={'steps': steps}) as third:
+                assert third.status == 200
+
+    async def test_sequence_cancelled_on_disconnect(self):
+        driver, _, imitator = get_test_instances()
+        steps = [
+            {'action': 'on', 'channel': 2},
+            {'action': 'wait', 'ms': 200},
+            {'action': 'set', 'channel': 2, 'voltage': 7.0},
+        ]
+        async with TestClient(TestServer(driver.create_rest_api())) as client:
+            resp = await client.post('/sequence', json={'steps': steps})
+            assert resp.status == 200
+            resp.close()
+            await asyncio.sleep(0.3)
+
+        assert driver.sequence_task.cancelled()
+        assert imitator.state[2]['voltage'] == 0.0
+
+    @pytest.mark.parametrize('steps', [
+        [],
+        [{'action': 'explode', 'channel': 1}],
+        [{'action': 'on', 'channel': 5}],
+        [{'action': 'on', 'channel': [1]}],
+        [{'action': 'on', 'channel': 1.0}],
+        [{'action': 'set', 'channel': 1, 'voltage': float('nan')}],
+        [{'action': 'set', 'channel': 1, 'current': 3.5}],
+        [{'action': 'wait', 'ms': -1}],
+        [{'action': 'wait', 'ms': float('inf')}],
+        [{'action': 'wait', 'ms': 10 ** 9}],
+        [{'action': 'ramp', 'channel': 4, 'start': 0.0, 'stop': 16.0, 'step': 1.0, 'interval_ms': 1}],
+        [{'action': 'ramp', 'channel': 4, 'start': 0.0, 'stop': 1.0, 'step': 0.0, 'interval_ms': 1}],
+        [{'action': 'ramp', 'channel': 4, 'start': 0.0, 'stop': 1.0, 'step': 5e-324, 'interval_ms': 1}],
+        [{'action': 'ramp', 'channel': 4, 'start': 0.0, 'stop': 0.000001, 'step': 0.0000001, 'interval_ms': 1}],
+        [{'action': 'wait_until', 'channel': 1, 'parameter': 'voltage', 'condition': '!=', 'value': 1.0,
+          'timeout_ms': 5}],
+        [{'action': 'wait_until', 'channel': 1, 'parameter': 'voltage', 'condition': '>', 'value': 1.0,
+          'timeout_ms': 10 ** 9}],
+        [{'action': 'wait_until', 'channel': 1, 'parameter': 'voltage', 'condition': '>', 'value': 1.0,
+          'timeout_ms': 5, 'poll_interval_ms': 0.01}],
+    ])
+    def test_sequence_validation(self, steps):
+        with pytest.raises(SequenceValidationException):
+            Sequence(steps)
+
+
+class TestHeadlessStartup:
+    """
+    Проверка быстрого старта headless драйвера
+    """
+    # Запускается в отдельном интерпретаторе, чтобы модули не были уже импортированы тестами.
+    # Класс драйвера передается аргументом: HeadlessDriver или Driver с REST API для сравнения
+    startup_script = """
+import json
+import sys
+import time
+
+started = time.perf_counter()
+
+import driver
+import headless
+from high_level_interface import DefaultHighInterface
+from low_level_interface import MockedInterface
+from power_supply_imitator import PowerSupplyImitator
+
+getattr(driver, sys.argv[1])(DefaultHighInterface(low_interface=MockedInterface(
+    host='', port=0, power_supply_model_object=PowerSupplyImitator())))
+
+print(json.dumps({'startup_time': time.perf_counter() - started, 'aiohttp_imported': 'aiohttp' in sys.modules}))
+"""
+
+    def measure_startup(self, driver_class: str) -> dict:
+        """
+        Лучший из нескольких запусков, чтобы сгладить шум загруженной машины
+        """
+        runs = []
+        for _ in range(3):
+            result = subprocess.run([sys.executable, '-c', self.startup_script, driver_class],
+                                    cwd=os.path.dirname(__file__), capture_output=True, text=True, check=True)
+            runs.append(json.loads(result.stdout))
+        return min(runs, key=lambda run: run['startup_time'])
+
+    def test_headless_startup(self):
+        headless = self.measure_startup('HeadlessDriver')
+        rest = self.measure_startup('Driver')
+
+        assert not headless['aiohttp_imported']
+        assert rest['aiohttp_imported']
+        assert headless['startup_time'] < rest['startup_time'] * DRIVER_HEADLESS_STARTUP_TIME_RATIO
+
+    def test_scpi_tree_shared(self):
+        assert SCPITranslator().root_node is SCPITranslator().root_node
+
+
+class TestProtection:
+    """
+    Проверка правил защиты каналов в цикле сбора телеметрии
+    """
+    @staticmethod
+    def get_protected_instances(rules: dict) -> (HeadlessDriver, PowerSupplyImitator):
+        imitator = PowerSupplyImitator()
+        driver = HeadlessDriver(
+            DefaultHighInterface(
+                low_interface=MockedInterface(host='', port=0, power_supply_model_object=imitator)
+            ),
+            protection_rules=rules
+        )
+        return driver, imitator
+
+    async def test_over_power_trip(self):
+        driver, imitator = self.get_protected_instances({1: {'over_power': 10.0}, 2: {'over_power': 10.0}})
+        await driver.interface.turn_on_channel(channel_number=1, voltage=10.0, current=2.0)
+        await driver.interface.turn_on_channel(channel_number=2, voltage=5.0, current=1.0)
+
+        await driver.poll_telemetry()
+
+        assert imitator.state[1]['state'] == 'OFF'
+        assert imitator.state[2]['state'] == 'ON'
+        assert [(trip['channel'], trip['rule']) for trip in driver.protection.trips] == [(1, 'over_power')]
+
+    async def test_voltage_rate_trip(self):
+        driver, imitator = self.get_protected_instances({2: {'voltage_rate': 1.0}})
+        await driver.interface.turn_on_channel(channel_number=2, voltage=1.0, current=1.0)
+        await driver.poll_telemetry()
+
+        assert imitator.state[2]['state'] == 'ON'
+
+        await driver.interface.set_channel_parameters(channel_number=2, voltage=30.0)
+        await driver.poll_telemetry()
+
+        assert imitator.state[2]['state'] == 'OFF'
+        assert driver.protection.trips[-1]['rule'] == 'voltage_rate'
+
+    async def test_disabled_channel_ignored(self):
+        driver, imitator = self.get_protected_instances({3: {'voltage_window': (1.0, 5.0)}})
+        await driver.poll_telemetry()
+
+        assert not driver.protection.trips
+
+    async def test_tripped_channel_locked(self):
+        driver, imitator = self.get_protected_instances({1: {'over_power': 10.0}})
+        await driver.interface.turn_on_channel(channel_number=1, voltage=10.0, current=2.0)
+        await driver.poll_telemetry()
+
+        with pytest.raises(ChannelLockedException):
+            await driver.interface.turn_on_channel(channel_number=1, voltage=1.0, current=1.0)
+        with pytest.raises(ChannelLockedException):
+            await driver.interface.set_channel_state(channel_number=1, state='ON')
+        assert imitator.state[1]['state'] == 'OFF'
+
+        driver.interface.unlock_channel(1)
+        await driver.interface.turn_on_channel(channel_number=1, voltage=1.0, current=1.0)
+        assert imitator.state[1]['state'] == 'ON'
+
+    async def test_trip_aborts_sequence(self):
+        driver, imitator = self.get_protected_instances({1: {'over_power': 10.0}})
+        await driver.interface.turn_on_channel(channel_number=1, voltage=10.0, current=2.0)
+        sequence = Sequence([
+            {'action': 'wait', 'ms': 50},
+            {'action': 'set', 'channel': 1, 'voltage': 1.0},
+            {'action': 'on', 'channel': 1},
+        ])
+        sequence_task = asyncio.create_task(SequenceRunner(driver.interface, sequence).run())
+        await driver.protect(await driver.interface.get_telemetry())
+        result = await sequence_task
+
+        assert result['event'] == 'error'
+        assert 'locked by protection' in result['error']
+        assert imitator.state[1] == {'voltage': 10.0, 'current': 2.0, 'state': 'OFF'}
+
+    async def test_watch_protection(self):
+        driver, imitator = self.get_protected_instances({2: {'over_current': 1.0}})
+        watch_task = asyncio.create_task(driver.watch_protection())
+        await asyncio.sleep(0)
+        await driver.interface.turn_on_channel(channel_number=2, voltage=5.0, current=2.0)
+        await asyncio.sleep(DRIVER_PROTECTION_DELAY * 1.5)
+        watch_task.cancel()
+
+        assert imitator.state[2]['state'] == 'OFF'
+
+    async def test_route_locked_channel_on(self):
+        driver, _, _ = get_test_instances()
+        driver.interface.lock_channel(1)
+        async with TestClient(TestServer(driver.create_rest_api())) as client:
+            async with client.post('/channel_on', json={'channel': 1, 'current': 1.0, 'voltage': 1.0}) as resp:
+                assert resp.status == 409
+            async with client.post('/protection_reset', json={'channel': 1}) as resp:
+                assert resp.status == 200
+                assert resp.headers['Method-Routing'] == 'reset_protection'
+            async with client.post('/channel_on', json={'channel': 1, 'current': 1.0, 'voltage': 1.0}) as resp:
+                assert resp.status == 200
+
+    @pytest.mark.parametrize('channel', [[1], 5, 1.0, '1'])
+    async def test_route_reset_wrong_channel(self, channel):
+        driver, _, _ = get_test_instances()
+        async with TestClient(TestServer(driver.create_rest_api())) as client:
+            async with client.post('/protection_reset', json={'channel': channel}) as resp:
+                assert resp.status == 400
+
+    async def test_watch_protection_survives_errors(self, monkeypatch):
+        driver, imitator = self.get_protected_instances({2: {'over_current': 1.0}})
+        await driver.interface.turn_on_channel(channel_number=2, voltage=5.0, current=2.0)
+
+        async def broken_turn_off_channel(*args, **kwargs):
+            raise ConnectionError('Device is not responding')
+
+        monkeypatch.setattr(driver.interface, 'turn_off_channel', broken_turn_off_channel)
+        watch_task = asyncio.create_task(driver.watch_protection())
+        await asyncio.sleep(DRIVER_PROTECTION_DELAY * 1.5)
+
+        assert not watch_task.done()
+        assert 2 in driver.interface.locked_channels
+
+        # После восстановления связи защита отключает канал на следующей проверке
+        monkeypatch.undo()
+        await asyncio.sleep(DRIVER_PROTECTION_DELAY * 1.5)
+        watch_task.cancel()
+
+        assert imitator.state[2]['state'] == 'OFF'
+
+    @pytest.mark.parametrize('rules', [
+        {5: {'over_current': 1.0}},
+        {1: {'under_current': 1.0}},
+        {1: 'over_current'},
+        {1: {'voltage_window': 30.0}},
+        {1: {'voltage_window': (30.0, 1.0)}},
+        {1: {'voltage_window': (1.0, 'max')}},
+        {1: {'over_power': '10'}},
+        {1: {'over_current': float('nan')}},
+        {1: {'voltage_rate': -1.0}},
+    ])
+    def test_protection_configuration(self, rules):
+        with pytest.raises(ProtectionConfigurationException):
+            self.get_protected_instances(rules)
+
+
+class TestRecordReplay:
+    """
+    Проверка записи обмена с устройством и его воспроизведения
+    """
+    class SlowMockedInterface(MockedInterface):
+        def send_text(self, command: str, uuid: str = None) -> str:
+            time.sleep(0.01)
+            return super().send_text(command, uuid=uuid)
+
+    @staticmethod
+    def get_recording_interface(filename, interface_class=MockedInterface) -> RecordingInterface:
+        return RecordingInterface(
+            host='',
+            port=0,
+            low_interface=interface_class(host='', port=0, power_supply_model_object=PowerSupplyImitator()),
+            record_filename=filename
+        )
+
+    async def record(self, filename) -> dict:
+        """
+        Записать включение канала и сеанс сбора телеметрии, вернуть телеметрию
+        """
+        low_interface = self.get_recording_interface(filename, self.SlowMockedInterface)
+        driver = HeadlessDriver(DefaultHighInterface(low_interface=low_interface))
+        await driver.interface.turn_on_channel(channel_number=1, voltage=10.0, current=2.0)
+        telemetry = await driver.poll_telemetry()
+        low_interface.disconnect()
+        return telemetry
+
+    async def test_record(self, tmp_path):
+        filename = tmp_path / 'record.gz'
+        await self.record(filename)
+
+        records = load_recording(filename)
+        assert [record[2] for record in records] == [':SOURce1:CURRent 2.0', ':SOURce1:VOLTage 10.0',
+                                                    ':OUTPut1:STATe ON', ':MEASure1:ALL', ':MEASure2:ALL',
+                                                    ':MEASure3:ALL', ':MEASure4:ALL']
+        assert all(latency >= 0.01 for _, latency, _, _ in records)
+        assert records[0][0] == 0.0
+
+    def test_record_reconnect(self, tmp_path):
+        filename = tmp_path / 'record.gz'
+        low_interface = self.get_recording_interface(filename)
+        low_interface.send_text(':MEASure1:ALL')
+        low_interface.send_text(':MEASure2:ALL')
+        low_interface.disconnect()
+        low_interface.connect()
+        low_interface.send_text(':MEASure3:ALL')
+        low_interface.disconnect()
+
+        assert [record[2] for record in load_recording(filename)] == [':MEASure1:ALL', ':MEASure2:ALL',
+                                                                     ':MEASure3:ALL']
+
+    def test_record_interrupted(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('low_level_interface.recording_interface.LOW_INTERFACE_RECORD_FLUSH_INTERVAL', 0.01)
+        filename = tmp_path / 'record.gz'
+        low_interface = self.get_recording_interface(filename)
+        commands = [f':MEASure{channel}:ALL' for channel in range(1, 5)]
+        for burst in range(2):
+            for command in commands:
+                low_interface.send_text(command)
+            # После пачки команд новых нет: вся пачка должна попасть на диск по таймеру
+            time.sleep(0.1)
+
+        # Копия файла без закрытия - как после аварийного завершения процесса записи
+        interrupted_filename = tmp_path / 'interrupted.gz'
+        interrupted_filename.write_bytes(filename.read_bytes())
+        low_interface.disconnect()
+
+        assert [record[2] for record in load_recording(interrupted_filename)] == commands * 2
+
+    async def test_replay(self, tmp_path):
+        filename = tmp_path / 'record.gz'
+        telemetry = await self.record(filename)
+
+        driver = HeadlessDriver(DefaultHighInterface(
+            low_interface=ReplayInterface(host='', port=0, record_filename=filename, time_scale=0)))
+        await driver.interface.turn_on_channel(channel_number=1, voltage=10.0, current=2.0)
+        assert await driver.poll_telemetry() == telemetry
+
+    async def test_replay_timing(self, tmp_path):
+        filename = tmp_path / 'record.gz'
+        await self.record(filename)
+
+        low_interface = ReplayInterface(host='', port=0, record_filename=filename, time_scale=2.0)
+        started = time.monotonic()
+        for record in low_interface.records:
+            low_interface.send_text(record[2])
+
+        assert time.monotonic() - started >= 2.0 * sum(record[1] for record in low_interface.records)
+        assert low_interface.get_arrival_times()[-1] >= 2.0 * 6 * 0.01
+
+    @pytest.mark.parametrize('time_scale', [-1.0, float('nan'), '1', True])
+    async def test_replay_wrong_time_scale(self, tmp_path, time_scale):
+        filename = tmp_path / 'record.gz'
+        await self.record(filename)
+
+        with pytest.raises(WrongParamsException):
+            ReplayInterface(host='', port=0, record_filename=filename, time_scale=time_scale)
+
+    async def test_replay_order(self, tmp_path):
+        filename = tmp_path / 'record.gz'
+        await self.record(filename)
+
+        low_interface = ReplayInterface(host='', port=0, record_filename=filename, time_scale=0)
+        with pytest.raises(ReplayMismatchException):
+            low_interface.send_text(':MEASure1:ALL')
+        # Ошибка не сдвигает воспроизведение: ожидаемая команда по-прежнему первая
+        low_interface.send_text(':SOURce1:CURRent 2.0')
+
+        low_interface = ReplayInterface(host='', port=0, record_filename=filename, time_scale=0, strict=False)
+        assert low_interface.send_text(':MEASure1:ALL')['state'] == 'ON'
+        with pytest.raises(ReplayExhaustedException):
+            low_interface.send_text(':MEASure1:ALL')